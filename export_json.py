@@ -1,24 +1,123 @@
+import argparse
 import json
+import numpy as np
+import openpyxl
 import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+try:
+    import polars as pl
+except ImportError:
+    # Polars 沒裝也能跑，會自動退回 pandas 流程
+    pl = None
+
+try:
+    import orjson
+except ImportError:
+    # orjson 沒裝就用內建 json，只是大檔解析會慢一些
+    orjson = None
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+try:
+    import xlsxwriter  # noqa: F401
+except ImportError:
+    xlsxwriter = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+
+if numba is not None:
+
+    @numba.njit(nogil=True, cache=True)
+    def _gsum(codes, vals, n_groups):
+        """Count + sum per group over category codes, one pass, no hashing."""
+        counts = np.zeros(n_groups, dtype=np.int64)
+        sums = np.zeros(n_groups, dtype=np.float64)
+        for i in range(codes.size):
+            c = codes[i]
+            counts[c] += 1
+            sums[c] += vals[i]
+        return counts, sums
+
+
+def _groupby_count_sum(df: pd.DataFrame, key: str) -> pd.DataFrame:
+    """Count + TotalDowntimeMin per ``key``, via the numba kernel if available."""
+    # kernel 要吃 category codes；外部直接丟進來的 DataFrame 不一定轉過
+    if numba is None or not isinstance(df[key].dtype, pd.CategoricalDtype):
+        return (
+            df.groupby(key, observed=True, sort=False)["downtime"]
+            .agg(Count="size", TotalDowntimeMin="sum")
+            .reset_index()
+        )
+
+    # category codes 是連續整數，kernel 直接 index 進輸出陣列就好
+    codes = df[key].cat.codes.to_numpy()
+    vals = df["downtime"].to_numpy(dtype=np.float64)
+    counts, sums = _gsum(codes, vals, len(df[key].cat.categories))
+    out = pd.DataFrame(
+        {key: df[key].cat.categories, "Count": counts, "TotalDowntimeMin": sums}
+    )
+    # 等同 observed=True：沒出現過的類別不進表
+    return out[out["Count"] > 0].reset_index(drop=True)
+
+
+def _load_records(json_path: Path) -> list:
+    """Read the raw JSON log file and return the list of records."""
+    if not json_path.exists():
+        raise FileNotFoundError(f"JSON file not found: {json_path}")
+
+    if orjson is not None:
+        # orjson 直接吃 bytes，跳過文字解碼那一層
+        data = orjson.loads(json_path.read_bytes())
+    else:
+        with open(json_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+
+    if not isinstance(data, list):
+        raise ValueError("JSON format error: root should be a list of records")
+
+    return data
+
+
+def _cache_path(json_path: Path) -> "Path | None":
+    """Feather cache file keyed by the source file's mtime + size."""
+    if pa is None or not json_path.exists():
+        return None
+    st = json_path.stat()
+    return json_path.with_name(
+        f".cache_{json_path.stem}_{st.st_mtime_ns}_{st.st_size}.feather"
+    )
+
 # === 設定區 ===
 # 1. 將 Download 下來的 maintenance_logs.json 放在跟這支程式同一個資料夾
 JSON_FILE = Path("maintenance_logs.json")
 # 2. 輸出的 Excel 報表名稱
 OUTPUT_FILE = Path("Maintenance_Report_From_JSON.xlsx")
+# 3. 超過這個大小（bytes）的 log 檔自動改走 Polars streaming
+LARGE_FILE_BYTES = 100_000_000
 
 
 def load_logs(json_path: Path) -> pd.DataFrame:
     """Load maintenance logs from JSON file into a DataFrame."""
-    if not json_path.exists():
-        raise FileNotFoundError(f"JSON file not found: {json_path}")
+    # 反覆調報表時 JSON 沒變就直接吃快取，跳過整段 parse + 欄位整理
+    cache_path = _cache_path(json_path)
+    if cache_path is not None and cache_path.exists():
+        try:
+            return pd.read_feather(cache_path)
+        except Exception:
+            # 快取壞掉（寫到一半等）就丟掉重 parse，不讓它擋住整個匯出
+            cache_path.unlink(missing_ok=True)
 
-    with open(json_path, "r", encoding="utf-8") as f:
-        data = json.load(f)
-
-    if not isinstance(data, list):
-        raise ValueError("JSON format error: root should be a list of records")
+    data = _load_records(json_path)
 
     df = pd.DataFrame(data)
 
@@ -32,8 +131,8 @@ def load_logs(json_path: Path) -> pd.DataFrame:
                 f"Available columns: {list(df.columns)}"
             )
 
-    df["date"] = pd.to_datetime(df["date"], errors="coerce")
-    df["month"] = df["date"].dt.to_period("M").astype(str)
+    # 指定 format 走 C fast-path，省掉 pandas 逐列猜格式（dateutil）那段
+    df["date"] = pd.to_datetime(df["date"], format="ISO8601", errors="coerce")
 
     # ====== Downtime 欄位（支援 downtime / downtime_min）======
     if "downtime" in df.columns:
@@ -58,67 +157,192 @@ def load_logs(json_path: Path) -> pd.DataFrame:
 
     # line / section / category 直接用原本名稱
     base_text_cols = ["line", "section", "category"]
+    text_cols = base_text_cols + list(col_map)
 
+    # 做欄位 mapping：缺的欄位先收進 dict，最後一次 assign，
+    # BlockManager 只 consolidate 一次，不是每插一欄搬一次
+    new_cols: dict = {}
     for col in base_text_cols:
         if col not in df.columns:
-            df[col] = ""
-        else:
-            df[col] = df[col].fillna("")
-
-    # 做欄位 mapping
+            new_cols[col] = ""
     for target_col, candidates in col_map.items():
-        if target_col in df.columns:
-            df[target_col] = df[target_col].fillna("")
-            continue
+        if target_col not in df.columns:
+            src_col = next((c for c in candidates if c in df.columns), None)
+            new_cols[target_col] = df[src_col] if src_col is not None else ""
+    if new_cols:
+        df = df.assign(**new_cols)
+
+    # NaN 補空字串：所有文字欄一次 fillna 掃完，不逐欄處理
+    df[text_cols] = df[text_cols].fillna("")
+
+    # 先按日期排好：Raw_Logs 直接用這份，不用在 build_summary 再複製一次排序
+    df.sort_values("date", inplace=True, ignore_index=True, kind="stable")
+
+    # ====== 低基數文字欄轉 category ======
+    # groupby 改走整數 codes，不用每列 hash 一個 Python str，記憶體也省很多
+    for col in ("line", "section", "equipment", "category"):
+        df[col] = df[col].astype("category")
+
+    # 自由文字欄（每筆都不一樣，不適合 category）改 Arrow string：
+    # 連續 UTF-8 buffer 而不是逐列 Python 物件，記憶體約省一半
+    if pa is not None:
+        for col in ("rootcause", "action"):
+            df[col] = df[col].astype("string[pyarrow]")
+
+    if cache_path is not None:
+        # 舊 key 的快取清掉再寫新的
+        for stale in json_path.parent.glob(f".cache_{json_path.stem}_*.feather"):
+            stale.unlink(missing_ok=True)
+        # 快取只是加速，寫失敗（例如欄位型別 Arrow 吃不下）不能讓匯出掛掉；
+        # 先寫 tmp 再 rename，避免留下半套檔案被下次誤用
+        tmp_path = cache_path.with_suffix(".feather.tmp")
+        try:
+            df.reset_index(drop=True).to_feather(tmp_path)
+            tmp_path.replace(cache_path)
+        except Exception:
+            tmp_path.unlink(missing_ok=True)
 
-        src_col = None
-        for c in candidates:
-            if c in df.columns:
-                src_col = c
-                break
+    return df
 
-        if src_col is not None:
-            df[target_col] = df[src_col].fillna("")
-        else:
-            df[target_col] = ""
 
-    return df
+def load_logs_polars(json_path: Path) -> "pl.LazyFrame":
+    """Load maintenance logs into a normalised Polars LazyFrame."""
+    raw = pl.from_dicts(_load_records(json_path))
+    cols = raw.columns
 
+    # ====== 日期欄位（支援 date / Date）======
+    if "date" not in cols:
+        if "Date" in cols:
+            raw = raw.rename({"Date": "date"})
+        else:
+            raise ValueError(
+                "Missing 'date' field in JSON records (also can't find 'Date'). "
+                f"Available columns: {cols}"
+            )
 
-def build_summary(df: pd.DataFrame) -> dict[str, pd.DataFrame]:
-    """Build multiple summary tables from the raw logs."""
-    summary: dict[str, pd.DataFrame] = {}
+    lf = raw.lazy().with_columns(
+        pl.col("date").str.strptime(pl.Datetime, strict=False)
+    )
 
-    # 1. Count by Line
-    by_line_count = (
-        df.groupby("line")
-        .size()
-        .reset_index(name="Count")
-        .sort_values("Count", ascending=False)
+    # ====== Downtime 欄位（支援 downtime / downtime_min）======
+    if "downtime" in cols:
+        pass
+    elif "downtime_min" in cols:
+        lf = lf.with_columns(pl.col("downtime_min").alias("downtime"))
+    else:
+        lf = lf.with_columns(pl.lit(0).alias("downtime"))
+
+    lf = lf.with_columns(
+        pl.col("downtime").cast(pl.Float64, strict=False).fill_null(0)
     )
-    summary["01_ByLine_Count"] = by_line_count
 
-    # 2. Downtime by Line
-    by_line_dt = (
-        df.groupby("line")["downtime"]
-        .sum()
-        .reset_index(name="TotalDowntimeMin")
-        .sort_values("TotalDowntimeMin", ascending=False)
+    # ====== 文字欄位對應（同 load_logs 的 col_map）======
+    col_map = {
+        "equipment": ["asset_id"],
+        "rootcause": ["root_cause"],
+        "action": ["action_taken"],
+    }
+    base_text_cols = ["line", "section", "category"]
+
+    text_exprs = []
+    for col in base_text_cols:
+        if col in cols:
+            text_exprs.append(pl.col(col).fill_null(""))
+        else:
+            text_exprs.append(pl.lit("").alias(col))
+
+    for target_col, candidates in col_map.items():
+        if target_col in cols:
+            text_exprs.append(pl.col(target_col).fill_null(""))
+            continue
+        src_col = next((c for c in candidates if c in cols), None)
+        if src_col is not None:
+            text_exprs.append(pl.col(src_col).fill_null("").alias(target_col))
+        else:
+            text_exprs.append(pl.lit("").alias(target_col))
+
+    return lf.with_columns(text_exprs)
+
+
+def build_summary_polars(
+    lf: "pl.LazyFrame", streaming: bool = False
+) -> dict[str, "pl.DataFrame"]:
+    """Build the summary tables as one batch of lazy queries.
+
+    All six aggregations share the same scan, so a single ``pl.collect_all``
+    lets the optimizer run projection pushdown once and execute them in
+    parallel across cores. With ``streaming=True`` the queries run on the
+    streaming engine, keeping intermediate state bounded for huge files.
+    """
+    queries = {
+        "01_ByLine_Count": (
+            lf.group_by("line")
+            .agg(pl.len().alias("Count"))
+            .sort("Count", descending=True)
+        ),
+        "02_ByLine_DowntimeMin": (
+            lf.group_by("line")
+            .agg(pl.col("downtime").sum().alias("TotalDowntimeMin"))
+            .sort("TotalDowntimeMin", descending=True)
+        ),
+        "03_ByMonth_DowntimeMin": (
+            # month key 聚合時才從 date 推，raw 表不帶這欄（跟 pandas 一致）；
+            # parse 失敗的日期一樣落在 "NaT" bucket
+            lf.group_by(
+                pl.col("date").dt.strftime("%Y-%m").fill_null("NaT").alias("month")
+            )
+            .agg(pl.col("downtime").sum().alias("TotalDowntimeMin"))
+            .sort("month")
+        ),
+        "04_ByCategory": (
+            lf.group_by("category")
+            .agg(
+                pl.len().alias("Count"),
+                pl.col("downtime").sum().alias("TotalDowntimeMin"),
+                pl.col("downtime").mean().alias("AvgDowntimeMin"),
+            )
+            .sort("TotalDowntimeMin", descending=True)
+        ),
+        "05_TopEquipment_Count": (
+            lf.group_by("equipment")
+            .agg(pl.len().alias("Count"))
+            .sort("Count", descending=True)
+            .head(20)
+        ),
+        "06_TopEquipment_DowntimeMin": (
+            lf.group_by("equipment")
+            .agg(pl.col("downtime").sum().alias("TotalDowntimeMin"))
+            .sort("TotalDowntimeMin", descending=True)
+            .head(20)
+        ),
+        "99_Raw_Logs": lf.sort("date"),
+    }
+
+    results = pl.collect_all(
+        list(queries.values()), engine="streaming" if streaming else "auto"
     )
-    summary["02_ByLine_DowntimeMin"] = by_line_dt
+    return dict(zip(queries.keys(), results))
 
-    # 3. Monthly downtime
+
+def _by_month_downtime(df: pd.DataFrame) -> pd.DataFrame:
+    """Monthly downtime：month key 直接從 datetime64 來，
+    不用 load_logs 先配一整欄字串（每月只在聚合後轉一次 str）。"""
+    # dropna=False：日期 parse 失敗的紀錄保留在 "NaT" 那一列，不會憑空消失
     by_month_dt = (
-        df.groupby("month")["downtime"]
+        df.groupby(df["date"].dt.to_period("M"), dropna=False)["downtime"]
         .sum()
         .reset_index(name="TotalDowntimeMin")
-        .sort_values("month")
+        .rename(columns={"date": "month"})
     )
-    summary["03_ByMonth_DowntimeMin"] = by_month_dt
+    # pandas 3.x 的 astype(str) 會把 NaT 留成缺值而不是 "NaT" 字串，補回去
+    by_month_dt["month"] = by_month_dt["month"].astype(str).fillna("NaT")
+    return by_month_dt
 
-    # 4. Category stats
-    by_cat = (
-        df.groupby("category")["downtime"]
+
+def _by_category(df: pd.DataFrame) -> pd.DataFrame:
+    """Category stats: count / total / average downtime."""
+    return (
+        df.groupby("category", observed=True, sort=False)["downtime"]
         .agg(
             Count="size",
             TotalDowntimeMin="sum",
@@ -127,54 +351,194 @@ def build_summary(df: pd.DataFrame) -> dict[str, pd.DataFrame]:
         .reset_index()
         .sort_values("TotalDowntimeMin", ascending=False)
     )
+
+
+def build_summary(df: pd.DataFrame) -> dict[str, pd.DataFrame]:
+    """Build multiple summary tables from the raw logs.
+
+    四組聚合互相獨立，pandas 數值 groupby 在 Cython 裡會放開 GIL，
+    所以丟進 thread pool 真的吃得到多核。
+    """
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        f_line = pool.submit(_groupby_count_sum, df, "line")
+        f_month = pool.submit(_by_month_downtime, df)
+        f_cat = pool.submit(_by_category, df)
+        f_equipment = pool.submit(_groupby_count_sum, df, "equipment")
+        by_line = f_line.result()
+        by_month_dt = f_month.result()
+        by_cat = f_cat.result()
+        by_equipment = f_equipment.result()
+
+    summary: dict[str, pd.DataFrame] = {}
+
+    # 1+2. Line 的 count 和 downtime 一次 groupby 算完，再各排各的
+    summary["01_ByLine_Count"] = (
+        by_line[["line", "Count"]].sort_values("Count", ascending=False)
+    )
+    summary["02_ByLine_DowntimeMin"] = (
+        by_line[["line", "TotalDowntimeMin"]]
+        .sort_values("TotalDowntimeMin", ascending=False)
+    )
+
+    # 3. Monthly downtime
+    summary["03_ByMonth_DowntimeMin"] = by_month_dt
+
+    # 4. Category stats
     summary["04_ByCategory"] = by_cat
 
-    # 5. Top 20 equipments by count
-    by_equipment_count = (
-        df.groupby("equipment")
-        .size()
-        .reset_index(name="Count")
+    # 5+6. Equipment 也只 groupby 一次，Top 20 從同一張表切出來
+    summary["05_TopEquipment_Count"] = (
+        by_equipment[["equipment", "Count"]]
         .sort_values("Count", ascending=False)
         .head(20)
     )
-    summary["05_TopEquipment_Count"] = by_equipment_count
-
-    # 6. Top 20 equipments by downtime
-    by_equipment_dt = (
-        df.groupby("equipment")["downtime"]
-        .sum()
-        .reset_index(name="TotalDowntimeMin")
+    summary["06_TopEquipment_DowntimeMin"] = (
+        by_equipment[["equipment", "TotalDowntimeMin"]]
         .sort_values("TotalDowntimeMin", ascending=False)
         .head(20)
     )
-    summary["06_TopEquipment_DowntimeMin"] = by_equipment_dt
 
-    # 7. Raw data (sorted)
-    summary["99_Raw_Logs"] = df.sort_values("date")
+    # 7. Raw data（load_logs 已經按日期排好了）
+    summary["99_Raw_Logs"] = df
 
     return summary
 
 
+def _export_xlsxwriter(tables: dict[str, pd.DataFrame], output_path: Path) -> None:
+    """xlsxwriter path: faster serializer than openpyxl for full workbooks."""
+    # strings_to_urls=False 跳過每個字串 cell 的 URL regex 偵測。
+    # 注意不能開 constant_memory：它要求嚴格逐列寫入，但 pandas 的
+    # to_excel 是逐欄送 cell，亂序的 cell 會被整個丟掉（表只剩第一欄）。
+    # 要省記憶體請走 openpyxl write_only 那條路。
+    with pd.ExcelWriter(
+        output_path,
+        engine="xlsxwriter",
+        engine_kwargs={
+            "options": {"strings_to_urls": False}
+        },
+    ) as writer:
+        for sheet_name, table in tables.items():
+            if pl is not None and isinstance(table, pl.DataFrame):
+                table = table.to_pandas()
+            table.to_excel(writer, sheet_name=sheet_name[:31], index=False)
+
+
+def _export_openpyxl_stream(
+    tables: dict[str, pd.DataFrame], output_path: Path
+) -> None:
+    """openpyxl fallback: write_only streams rows without the full cell tree."""
+    # （99_Raw_Logs 全部原始資料那張表差最多）
+    wb = openpyxl.Workbook(write_only=True)
+    for sheet_name, table in tables.items():
+        if pl is not None and isinstance(table, pl.DataFrame):
+            table = table.to_pandas()
+        # NaT / NaN 轉 None，openpyxl 才會寫成空格
+        table = table.astype(object).where(table.notna(), None)
+        ws = wb.create_sheet(title=sheet_name[:31])  # Excel sheet name limit
+        ws.append(list(table.columns))
+        for row in table.itertuples(index=False, name=None):
+            ws.append(row)
+    wb.save(output_path)
+
+
 def export_to_excel(tables: dict[str, pd.DataFrame], output_path: Path) -> None:
     """Write all summary tables into one Excel workbook."""
-    with pd.ExcelWriter(output_path, engine="openpyxl") as writer:
-        for sheet_name, table in tables.items():
-            safe_name = sheet_name[:31]  # Excel sheet name limit
-            table.to_excel(writer, sheet_name=safe_name, index=False)
+    if xlsxwriter is not None:
+        _export_xlsxwriter(tables, output_path)
+    else:
+        _export_openpyxl_stream(tables, output_path)
 
     print(f"Report exported to: {output_path.resolve()}")
 
 
-def main():
-    print(f"Loading JSON logs from: {JSON_FILE}")
-    df = load_logs(JSON_FILE)
-    print(f"Loaded {len(df)} records.")
+def export_to_parquet(tables: dict[str, pd.DataFrame], base_path: Path) -> None:
+    """Write each summary table as a zstd-compressed Parquet file.
+
+    Parquet 給後續要再丟回 pandas / Polars 分析的人用，讀寫都比 xlsx
+    快一個數量級，檔案也小很多；Excel 留著當給人看的報表。
+    """
+    if pa is None:
+        raise RuntimeError(
+            "pyarrow is required for parquet output (pip install pyarrow)"
+        )
+
+    for sheet_name, table in tables.items():
+        out_file = base_path.with_name(f"{base_path.stem}_{sheet_name}.parquet")
+        if pl is not None and isinstance(table, pl.DataFrame):
+            table.write_parquet(out_file, compression="zstd")
+        else:
+            pq.write_table(
+                pa.Table.from_pandas(table, preserve_index=False),
+                out_file,
+                compression="zstd",
+            )
 
-    print("Building summary tables...")
-    summary_tables = build_summary(df)
+    print(f"Parquet tables exported next to: {base_path.resolve()}")
 
-    print("Exporting Excel report...")
-    export_to_excel(summary_tables, OUTPUT_FILE)
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Export maintenance_logs.json into summary reports"
+    )
+    parser.add_argument(
+        "--input",
+        type=Path,
+        default=JSON_FILE,
+        help=f"input JSON log file (default: {JSON_FILE})",
+    )
+    parser.add_argument(
+        "--output",
+        type=Path,
+        default=OUTPUT_FILE,
+        help=f"output Excel report (default: {OUTPUT_FILE})",
+    )
+    parser.add_argument(
+        "--format",
+        choices=("excel", "parquet", "both"),
+        default="excel",
+        help="output format (default: excel)",
+    )
+    parser.add_argument(
+        "--engine",
+        choices=("auto", "pandas", "polars"),
+        default="auto",
+        help=(
+            "dataframe engine; auto picks polars (streaming) above "
+            f"{LARGE_FILE_BYTES // 1_000_000} MB, pandas below"
+        ),
+    )
+    args = parser.parse_args()
+    input_file: Path = args.input
+    output_file: Path = args.output
+
+    file_size = input_file.stat().st_size if input_file.exists() else 0
+    engine = args.engine
+    if engine == "auto":
+        engine = "polars" if (pl is not None and file_size > LARGE_FILE_BYTES) else "pandas"
+    if engine == "polars" and pl is None:
+        raise RuntimeError(
+            "polars is required for --engine polars (pip install polars)"
+        )
+
+    print(f"Loading JSON logs from: {input_file}")
+    if engine == "polars":
+        lf = load_logs_polars(input_file)
+        print("Building summary tables (polars)...")
+        summary_tables = build_summary_polars(
+            lf, streaming=file_size > LARGE_FILE_BYTES
+        )
+    else:
+        df = load_logs(input_file)
+        print(f"Loaded {len(df)} records.")
+        print("Building summary tables...")
+        summary_tables = build_summary(df)
+
+    if args.format in ("excel", "both"):
+        print("Exporting Excel report...")
+        export_to_excel(summary_tables, output_file)
+    if args.format in ("parquet", "both"):
+        print("Exporting Parquet tables...")
+        export_to_parquet(summary_tables, output_file)
     print("Done ✅")
 
 
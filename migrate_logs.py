@@ -0,0 +1,139 @@
+"""Migrate a legacy maintenance_logs.json into the new frontend schema.
+
+把舊版 Python 報表用的欄位 (equipment / rootcause / action ...) 轉成
+前端現在存的欄位 (asset_id / root_cause / action_taken ...)。
+逐筆串流處理，不會把整份檔案讀進記憶體。
+"""
+
+import json
+from pathlib import Path
+
+try:
+    import ijson
+except ImportError:
+    # 沒裝 ijson 就一次讀完整個檔（小檔沒差，大檔建議裝）
+    ijson = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import pandas as pd
+except ImportError:
+    pd = None
+
+# 小於這個大小就整批用 pandas rename（免去逐筆 Python 迴圈），
+# 超過才走逐筆串流，避免整份檔案進記憶體
+BATCH_MAX_BYTES = 100_000_000
+
+# === 設定區 ===
+# 1. 舊格式的 log 檔
+INPUT_FILE = Path("maintenance_logs_old.json")
+# 2. 轉完的新格式檔名（前端 Download 下來的同名格式）
+OUTPUT_FILE = Path("maintenance_logs.json")
+
+# 舊欄位 -> 新欄位
+FIELD_MAP = {
+    "date": "Date",
+    "equipment": "asset_id",
+    "downtime": "downtime_min",
+    "rootcause": "root_cause",
+    "action": "action_taken",
+}
+
+# 新 schema 才有、舊資料沒有的欄位
+NEW_FIELDS = ("location_from", "location_to")
+
+
+def convert_record(record: dict) -> dict:
+    """Map one legacy record onto the new schema."""
+    new_record = {FIELD_MAP.get(k, k): v for k, v in record.items()}
+    for field in NEW_FIELDS:
+        new_record.setdefault(field, "")
+    return new_record
+
+
+def _dumps(record: dict) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(record)
+    return json.dumps(record, ensure_ascii=False).encode("utf-8")
+
+
+def iter_records(input_path: Path):
+    """Yield records one at a time without materializing the whole list."""
+    if ijson is not None:
+        with open(input_path, "rb") as f:
+            yield from ijson.items(f, "item")
+    else:
+        with open(input_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if not isinstance(data, list):
+            raise ValueError("JSON format error: root should be a list of records")
+        yield from data
+
+
+def _migrate_batch(input_path: Path, output_path: Path) -> int:
+    """Transform the whole file with one vectorized column rename."""
+    if orjson is not None:
+        data = orjson.loads(input_path.read_bytes())
+    else:
+        with open(input_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    if not isinstance(data, list):
+        raise ValueError("JSON format error: root should be a list of records")
+
+    # dtype=object 保住原始值：int 不會被缺值拉成 float、null 維持 None
+    df = pd.DataFrame(data, dtype=object).rename(columns=FIELD_MAP)
+    for field in NEW_FIELDS:
+        df[field] = df[field].fillna("") if field in df.columns else ""
+
+    # DataFrame 會把所有 record 的欄位聯集起來，原本沒有的 key 變 NaN；
+    # 這裡把 NaN（缺 key）整個拿掉、None（原本就是 null）留著，
+    # 輸出才跟逐筆 convert_record 一致，也不會讓 json.dump 吐出
+    # 不合法的 NaN literal
+    records = [
+        {k: v for k, v in rec.items() if not (isinstance(v, float) and v != v)}
+        for rec in df.to_dict(orient="records")
+    ]
+    if orjson is not None:
+        output_path.write_bytes(
+            orjson.dumps(records, option=orjson.OPT_INDENT_2 | orjson.OPT_APPEND_NEWLINE)
+        )
+    else:
+        with open(output_path, "w", encoding="utf-8") as out:
+            json.dump(records, out, ensure_ascii=False, indent=2)
+
+    return len(records)
+
+
+def migrate(input_path: Path = INPUT_FILE, output_path: Path = OUTPUT_FILE) -> int:
+    """Migrate the legacy file: batched rename when small, streaming when big."""
+    if not input_path.exists():
+        raise FileNotFoundError(f"Input file not found: {input_path}")
+
+    if pd is not None and input_path.stat().st_size <= BATCH_MAX_BYTES:
+        return _migrate_batch(input_path, output_path)
+
+    count = 0
+    with open(output_path, "wb") as out:
+        out.write(b"[\n")
+        for record in iter_records(input_path):
+            if count:
+                out.write(b",\n")
+            out.write(_dumps(convert_record(record)))
+            count += 1
+        out.write(b"\n]\n")
+
+    return count
+
+
+def main():
+    print(f"Migrating {INPUT_FILE} -> {OUTPUT_FILE}")
+    count = migrate()
+    print(f"Migrated {count} records. Done ✅")
+
+
+if __name__ == "__main__":
+    main()